@@ -2,20 +2,30 @@
 # Tool to speed up "true stretch" config for VALORANT on Windows.
 # Made by GlitchFL (credit required if you share)
 
-import os, re, sys, difflib
+import os, re, sys, mmap, functools
 from pathlib import Path
 import tkinter as tk
-from tkinter import messagebox, font
 from tkinter import ttk
-from tkinter.scrolledtext import ScrolledText
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
 
 APP_TITLE = "VALORANT Configuration Tool"
 VERSION = "2.0"
+LOG_FLUSH_MS = 50  # how often queued log output is drawn
 
 FULLSCREEN_KEY = "FullscreenMode"
 HDR_KEY = "HDRDisplayOutputNits"
 
+_HDR_RE = re.compile(rf"^\s*{HDR_KEY}\s*=\s*\d+\s*$")
+_FS_RE = re.compile(rf"^\s*{FULLSCREEN_KEY}\s*=\s*\d+\s*$")
+_WHX_RE = re.compile(r"(\d+)[xX](\d+)")
+# [^\S\n] is whitespace that stays on the same line, so a search over the whole file
+# matches exactly what a per-line match used to
+_LAST_USER_RE = re.compile(r"^[^\S\n]*LastKnownUser[^\S\n]*=[^\S\n]*([A-Za-z0-9\-]+)[^\S\n]*$", re.MULTILINE)
+
 COLORS = {
     'bg': '#1a1a1a',
     'bg_secondary': '#242424',
@@ -37,78 +47,116 @@ RESOLUTIONS = {
 
 def parse_whx(s):
     s = s.strip()
-    m = re.fullmatch(r"(\d+)[xX](\d+)", s)
+    m = _WHX_RE.fullmatch(s)
     if not m:
         raise ValueError("Invalid format. Use WIDTHxHEIGHT (e.g., 2560x1440)")
     return int(m.group(1)), int(m.group(2))
 
 def read_lines(path: Path):
-    return path.read_text(encoding="utf-8", errors="ignore").splitlines(keepends=True)
-
-def write_lines(path: Path, lines):
-    path.write_text("".join(lines), encoding="utf-8")
-
-def update_kv_lines(lines, updates: dict):
-    """Replace/add key=value pairs while preserving other content/formatting."""
-    changed = False
-    found = set()
-    out = []
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []  # mmap can't map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            txt = str(mm, "utf-8", "ignore")
+    # same newline handling as text-mode read_text()
+    return txt.replace("\r\n", "\n").replace("\r", "\n").splitlines(keepends=True)
+
+def _file_has_lines(path: Path, lines):
+    """True if path already holds exactly the bytes write_lines would write for lines."""
+    try:
+        old = memoryview(path.read_bytes())
+    except FileNotFoundError:
+        return False
+    pos = 0
     for ln in lines:
-        m = re.match(r"^\s*([A-Za-z0-9_]+)\s*=\s*(.*)\s*$", ln)
-        if m:
-            k = m.group(1)
-            if k in updates and updates[k] is not None:
-                v = str(updates[k])
-                new_ln = f"{k}={v}\n"
-                if ln != new_ln:
-                    changed = True
-                    ln = new_ln
-                found.add(k)
-        out.append(ln)
-    for k, v in updates.items():
-        if v is None: continue
-        if k not in found:
-            out.append(f"{k}={v}\n")
-            changed = True
-    return out, changed
+        chunk = ln.replace("\n", os.linesep).encode("utf-8")
+        end = pos + len(chunk)
+        if old[pos:end] != chunk:
+            return False
+        pos = end
+    return pos == len(old)
 
-def ensure_hdr_and_fullscreen(lines, hdr_val="1000", fs_val="2"):
+def write_lines(path: Path, lines):
+    """Write lines (text-mode newlines); returns False without writing if the file already has these bytes."""
+    if _file_has_lines(path, lines):
+        return False
+    # stream the lines through the buffered writer instead of joining them first
+    with open(path, "w", encoding="utf-8", buffering=64 * 1024) as f:
+        f.writelines(lines)
+    return True
+
+def _rewrite_ini(lines, update_lines, hdr_val="1000", fs_val="2"):
     """
-    Guarantee HDRDisplayOutputNits=hdr_val and FullscreenMode=fs_val
-    with FullscreenMode placed directly below HDR.
+    Single pass over the ini lines: replace/add the lines in update_lines
+    (key -> rendered "key=value\\n", see _target_update_lines) and guarantee
+    HDRDisplayOutputNits=hdr_val and FullscreenMode=fs_val with FullscreenMode
+    placed directly below HDR.
     If HDR line missing entirely, append both HDR + Fullscreen at EOF.
+    Returns (new_lines, changed_keys), changed_keys in first-change order.
     """
-    out = []
+    hdr_ln = f"{HDR_KEY}={hdr_val}\n"
+    fs_ln = f"{FULLSCREEN_KEY}={fs_val}\n"
+    changed = {}  # ordered set of keys whose lines were rewritten/added/dropped
+    found = set()
     seen_hdr = False
-    inserted_fs = False
+    skip_next = False
+    out = []
 
-    for ln in lines:
-        if re.match(rf"^\s*{HDR_KEY}\s*=\s*\d+\s*$", ln):
-            seen_hdr = True
-            ln = f"{HDR_KEY}={hdr_val}\n"
+    for i, ln in enumerate(lines):
+        if skip_next:
+            # FullscreenMode already sits right below HDR with the wanted value
+            skip_next = False
+            continue
+        head, sep, _ = ln.partition("=")
+        k = head.strip()
+        # same keys as [A-Za-z0-9_]+, checked with C-level str methods
+        if not sep or not (k.isascii() and k.replace("_", "a").isalnum()):
             out.append(ln)
-            out.append(f"{FULLSCREEN_KEY}={fs_val}\n")
-            inserted_fs = True
-        elif re.match(rf"^\s*{FULLSCREEN_KEY}\s*=\s*\d+\s*$", ln):
             continue
+        if k == HDR_KEY and _HDR_RE.match(ln):
+            seen_hdr = True
+            out.append(hdr_ln)
+            out.append(fs_ln)
+            if ln != hdr_ln:
+                changed[HDR_KEY] = None
+            if i + 1 < len(lines) and lines[i + 1] == fs_ln:
+                skip_next = True
+            else:
+                changed[FULLSCREEN_KEY] = None
+        elif k == FULLSCREEN_KEY and _FS_RE.match(ln):
+            # old FullscreenMode lines are dropped, it's reinserted below HDR
+            changed[FULLSCREEN_KEY] = None
+        elif k in update_lines:
+            new_ln = update_lines[k]
+            if ln != new_ln:
+                changed[k] = None
+            out.append(new_ln)
+            found.add(k)
         else:
             out.append(ln)
 
+    for k, new_ln in update_lines.items():
+        if k not in found:
+            out.append(new_ln)
+            changed[k] = None
+
     if not seen_hdr:
         if len(out) == 0 or not out[-1].endswith("\n"):
             out.append("\n")
-        out.append(f"{HDR_KEY}={hdr_val}\n")
-        out.append(f"{FULLSCREEN_KEY}={fs_val}\n")
-        inserted_fs = True
+        out.append(hdr_ln)
+        out.append(fs_ln)
+        changed[HDR_KEY] = None
+        changed[FULLSCREEN_KEY] = None
 
-    return out, inserted_fs
+    return out, list(changed)
 
-def file_diff(old_lines, new_lines, label):
+def file_diff(old_lines, new_lines, label, n=0):
+    import difflib  # only needed for PREVIEW, keep it off the startup path
     return "".join(difflib.unified_diff(
         old_lines, new_lines,
         fromfile=f"{label} (current)",
         tofile=f"{label} (new)",
-        n=3
+        n=n
     ))
 
 def get_base_config_dir():
@@ -119,48 +167,50 @@ def get_base_config_dir():
 
 def get_last_known_user(windows_client_dir: Path):
     rlmi = windows_client_dir / "RiotLocalMachine.ini"
-    if not rlmi.is_file():
+    try:
+        txt = rlmi.read_text(encoding="utf-8", errors="ignore")
+    except FileNotFoundError:
         return None
-    txt = rlmi.read_text(encoding="utf-8", errors="ignore").splitlines()
-    for ln in txt:
-        m = re.match(r"^\s*LastKnownUser\s*=\s*([A-Za-z0-9\-]+)\s*$", ln)
-        if m:
-            return m.group(1)
-    return None
+    m = _LAST_USER_RE.search(txt)
+    return m.group(1) if m else None
 
 def find_user_folder(base: Path, last_known: str):
     if not last_known:
         return None
-    candidates = [p for p in base.iterdir()
-                  if p.is_dir() and p.name.lower().startswith(last_known.lower() + "-")]
-    def score(p):
-        s = 0
-        if (p / "Windows").is_dir(): s += 1
-        if (p / "WindowsClient").is_dir(): s += 1
-        return s
-    if not candidates:
-        return None
-    candidates.sort(key=score, reverse=True)
-    return candidates[0]
+    prefix = last_known.lower() + "-"
+    best_score, best = -1, None
+    # DirEntry.is_dir() uses the directory listing data, no extra stat per entry
+    with os.scandir(base) as it:
+        for entry in it:
+            if not entry.name.lower().startswith(prefix) or not entry.is_dir():
+                continue
+            s = (os.path.isdir(os.path.join(entry.path, "Windows"))
+                 + os.path.isdir(os.path.join(entry.path, "WindowsClient")))
+            # first folder with the best score wins, same as the old stable sort
+            if s > best_score:
+                best_score, best = s, entry.path
+                if s == 2:
+                    break
+    return Path(best) if best else None
 
 def native_check_ok(lines, native_x, native_y):
-    want = {
-        "ResolutionSizeX": str(native_x),
-        "ResolutionSizeY": str(native_y),
-        "LastUserConfirmedResolutionSizeX": str(native_x),
-        "LastUserConfirmedResolutionSizeY": str(native_y),
-        "bShouldLetterbox": "False",
-        "bLastConfirmedShouldLetterbox": "False",
-    }
-    got = {}
+    # native settings are the same six keys the target rewrite sets
+    remaining = dict(make_updates_for_target(native_x, native_y))
     for ln in lines:
-        m = re.match(r"^\s*([A-Za-z0-9_]+)\s*=\s*(.*)\s*$", ln)
-        if m:
-            got[m.group(1)] = m.group(2).strip()
-    for k, v in want.items():
-        if got.get(k) != v:
-            return False, k, got.get(k)
-    return True, None, None
+        head, sep, rest = ln.partition("=")
+        if not sep:
+            continue
+        k = head.strip()
+        want = remaining.pop(k, None)
+        if want is None:
+            continue
+        got = rest.strip()
+        if got != want:
+            return False, k, got
+        if not remaining:
+            return True, None, None
+    # at least one wanted key isn't in the file
+    return False, next(iter(remaining)), None
 
 def make_updates_for_target(target_x, target_y):
     return {
@@ -172,35 +222,68 @@ def make_updates_for_target(target_x, target_y):
         "bLastConfirmedShouldLetterbox": "False",
     }
 
+@functools.lru_cache(maxsize=None)
+def _target_update_lines(target_x, target_y):
+    """
+    make_updates_for_target rendered into ready-to-write ini lines, built once
+    per target res and shared by every file rewritten for it (read-only).
+    """
+    return MappingProxyType({
+        k: f"{k}={v}\n"
+        for k, v in make_updates_for_target(target_x, target_y).items()
+        if v is not None
+    })
+
+def process_gus(path: Path, target_x, target_y, apply_changes, label, log_func, old_lines=None):
+    if old_lines is not None:
+        old = old_lines
+    else:
+        try:
+            old = read_lines(path)
+        except FileNotFoundError:
+            log_func(f"- Not found: {label} -> {path} (skipped)")
+            return
 
+    # Update res + flags and ensure HDR=1000 + FullscreenMode=2 together
+    update_lines = _target_update_lines(target_x, target_y)
+    new, changed_keys = _rewrite_ini(old, update_lines, "1000", "2")
 
-def process_gus(path: Path, target_x, target_y, apply_changes, label, log_func):
-    if not path.is_file():
-        log_func(f"- Skipping (not found): {label} -> {path}")
-        return
-    
-    old = read_lines(path)
-
-    # 1) Update res + flags
-    updates = make_updates_for_target(target_x, target_y)
-    temp, changed_a = update_kv_lines(old, updates)
-
-    # 2) Ensure HDR=1000 + FullscreenMode=2 together
-    temp2, inserted = ensure_hdr_and_fullscreen(temp, "1000", "2")
-    changed = changed_a or (temp2 != old)
-
-    if not changed:
+    if not changed_keys:
         log_func(f"- No changes needed: {label}")
         return
 
-    diff = file_diff(old, temp2, str(path))
-    log_func(f"\n>>> {label}\n{diff if diff.strip() else '(content replaced)'}")
     if apply_changes:
-        write_lines(path, temp2)
-        log_func(f"-> Updated {label}.")
+        # no diff here, the user already saw it in Preview
+        if write_lines(path, new):
+            log_func(f"-> Updated {label}: {', '.join(changed_keys)}.")
+        else:
+            log_func(f"- No changes needed: {label} (file already up to date)")
     else:
+        diff = file_diff(old, new, str(path))
+        log_func(f"\n>>> {label}\n{diff if diff.strip() else '(content replaced)'}")
         log_func("-> Dry run (no write).")
 
+def _process_one(path: Path, target_x, target_y, apply_changes, label, old_lines=None):
+    """Run process_gus for one target and return its log lines instead of logging them."""
+    buf = []
+    process_gus(path, target_x, target_y, apply_changes, label, buf.append, old_lines)
+    return buf
+
+@dataclass
+class Plan:
+    """Everything VERIFY/PREVIEW/APPLY need to know before touching the target files."""
+    key: tuple            # (native_x, native_y, force) the plan was built for
+    base: Path
+    gus_root: Path
+    root_stamp: tuple     # (mtime_ns, size) of gus_root when root_lines was read
+    root_lines: list
+    native_ok: bool
+    bad_key: str
+    bad_val: str
+    last_user: str
+    user_dir: Path
+    targets: list
+
 # -------------------- Professional GUI --------------------
 
 class ProfessionalApp(tk.Tk):
@@ -208,22 +291,25 @@ class ProfessionalApp(tk.Tk):
         super().__init__()
         
         self.title(APP_TITLE)
-        self.geometry("900x700")
+        # Size and center in one geometry call (each one is a WM round-trip)
+        x = (self.winfo_screenwidth() // 2) - (900 // 2)
+        y = (self.winfo_screenheight() // 2) - (700 // 2)
+        self.geometry(f"900x700+{x}+{y}")
         self.minsize(800, 600)
         self.configure(bg=COLORS['bg'])
         
         # Configure window
         self.resizable(True, True)
         
+        # Plan from the last VERIFY/PREVIEW, reused while the root ini is unchanged
+        self._cached_plan = None
+        
+        # Log/status updates from worker threads, drained on the Tk thread
+        self._ui_queue = queue.Queue()
+        
         # Set up main layout
         self.setup_ui()
-        self.center_window()
-        
-    def center_window(self):
-        self.update_idletasks()
-        x = (self.winfo_screenwidth() // 2) - (900 // 2)
-        y = (self.winfo_screenheight() // 2) - (700 // 2)
-        self.geometry(f"900x700+{x}+{y}")
+        self.after(LOG_FLUSH_MS, self._flush_log)
         
     def setup_ui(self):
         main = tk.Frame(self, bg=COLORS['bg'])
@@ -369,10 +455,18 @@ class ProfessionalApp(tk.Tk):
         btn_container.pack()
         
         # Create buttons
+        self.bind_button_class()
         self.create_button(btn_container, "VERIFY", self.preflight, False).pack(side='left', padx=5)
         self.create_button(btn_container, "PREVIEW", self.dry_run, False).pack(side='left', padx=5)
         self.create_button(btn_container, "APPLY", self.apply, True).pack(side='left', padx=5)
         
+    def bind_button_class(self):
+        # Shared handlers for every create_button label, bound once on the
+        # 'HoverButton' bindtag; each label carries its own colors and command.
+        self.bind_class('HoverButton', '<Enter>', lambda e: e.widget.config(bg=e.widget.hover_colors[1]))
+        self.bind_class('HoverButton', '<Leave>', lambda e: e.widget.config(bg=e.widget.hover_colors[0]))
+        self.bind_class('HoverButton', '<Button-1>', lambda e: e.widget.on_click())
+        
     def create_button(self, parent, text, command, primary=False):
         frame = tk.Frame(parent, bg=COLORS['bg'])
         
@@ -397,16 +491,9 @@ class ProfessionalApp(tk.Tk):
         )
         btn.pack()
         
-        def on_enter(e):
-            btn.config(bg=hover_bg)
-        def on_leave(e):
-            btn.config(bg=bg)
-        def on_click(e):
-            command()
-            
-        btn.bind('<Enter>', on_enter)
-        btn.bind('<Leave>', on_leave)
-        btn.bind('<Button-1>', on_click)
+        btn.hover_colors = (bg, hover_bg)
+        btn.on_click = command
+        btn.bindtags(('HoverButton',) + btn.bindtags())
         
         return frame
         
@@ -481,17 +568,36 @@ class ProfessionalApp(tk.Tk):
         )
         self.status.pack(fill='x', padx=30, pady=(0, 10))
         
+    # log/clear_log/set_status are called from worker threads, so they only queue
+    # the update; _flush_log applies them in batches from the Tk event loop.
     def log(self, msg, tag=None):
-        self.output.insert('end', msg + '\n', tag)
-        self.output.see('end')
-        self.update_idletasks()
+        self._ui_queue.put(('log', msg, tag))
         
     def clear_log(self):
-        self.output.delete('1.0', 'end')
+        self._ui_queue.put(('clear',))
         
     def set_status(self, msg):
-        self.status.config(text=msg)
-        self.update_idletasks()
+        self._ui_queue.put(('status', msg))
+        
+    def _flush_log(self):
+        chunks = []
+        try:
+            while True:
+                item = self._ui_queue.get_nowait()
+                if item[0] == 'log':
+                    chunks += [item[1] + '\n', item[2] or '']
+                elif item[0] == 'clear':
+                    chunks = []
+                    self.output.delete('1.0', 'end')
+                elif item[0] == 'status':
+                    self.status.config(text=item[1])
+        except queue.Empty:
+            pass
+        if chunks:
+            # one insert (text, tags, text, tags, ...) and one scroll per batch
+            self.output.insert('end', *chunks)
+            self.output.see('end')
+        self.after(LOG_FLUSH_MS, self._flush_log)
         
     def parse_inputs(self):
         try:
@@ -499,36 +605,30 @@ class ProfessionalApp(tk.Tk):
             tx, ty = parse_whx(self.target_var.get())
             return nx, ny, tx, ty
         except ValueError as e:
+            from tkinter import messagebox
             messagebox.showerror("Input Error", str(e))
             return None
             
-    def get_targets_and_check(self, nx, ny, force=False):
+    def get_plan(self, nx, ny, force=False):
         base = get_base_config_dir()
         winclient = base / "WindowsClient"
         gus_root = winclient / "GameUserSettings.ini"
+        key = (nx, ny, force)
 
-        if not gus_root.is_file():
+        try:
+            st = gus_root.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+            plan = self._cached_plan
+            if plan is not None and plan.key == key and plan.gus_root == gus_root and plan.root_stamp == stamp:
+                return plan
+            root_lines = read_lines(gus_root)
+        except FileNotFoundError:
             raise RuntimeError("Missing GameUserSettings.ini in WindowsClient. Launch Valorant once (native Fullscreen+Fill), then close.")
 
-        # Native check
-        root_lines = read_lines(gus_root)
         ok, bad_key, bad_val = native_check_ok(root_lines, nx, ny)
-        if not ok and not force:
-            self.log(f"[!] Native check failed on {gus_root}", 'error')
-            self.log(f"    Expected {bad_key} to match native {nx}x{ny} / flags False. Got '{bad_val}'.", 'error')
-            self.log("    -> Open Valorant on Fullscreen+Fill at native, then close and rerun.", 'warning')
-            self.set_status("Native check failed")
-            return None
-        elif not ok and force:
-            self.log(f"[!] Native check failed but continuing (--force). Key {bad_key} got '{bad_val}'", 'warning')
-
         last_user = get_last_known_user(winclient)
         user_dir = find_user_folder(base, last_user) if last_user else None
 
-        self.log(f"Base config: {base}", 'dim')
-        self.log(f"LastKnownUser: {last_user or '??'}", 'dim')
-        self.log(f"User folder: {user_dir if user_dir else 'NOT FOUND (will still update root)'}", 'dim')
-
         targets = [(gus_root, "Root WindowsClient/GameUserSettings.ini")]
         if user_dir:
             targets += [
@@ -536,32 +636,72 @@ class ProfessionalApp(tk.Tk):
                 (user_dir / "Windows" / "GameUserSettings.ini", f"{user_dir.name}/Windows/GameUserSettings.ini"),
             ]
 
-        return targets
-        
+        plan = Plan(key, base, gus_root, stamp, root_lines, ok, bad_key, bad_val, last_user, user_dir, targets)
+        self._cached_plan = plan
+        return plan
+
+    def get_targets_and_check(self, nx, ny, force=False):
+        plan = self.get_plan(nx, ny, force)
+
+        # Native check
+        if not plan.native_ok and not force:
+            self.log(f"[!] Native check failed on {plan.gus_root}", 'error')
+            self.log(f"    Expected {plan.bad_key} to match native {nx}x{ny} / flags False. Got '{plan.bad_val}'.", 'error')
+            self.log("    -> Open Valorant on Fullscreen+Fill at native, then close and rerun.", 'warning')
+            self.set_status("Native check failed")
+            return None
+        elif not plan.native_ok and force:
+            self.log(f"[!] Native check failed but continuing (--force). Key {plan.bad_key} got '{plan.bad_val}'", 'warning')
+
+        self.log(f"Base config: {plan.base}", 'dim')
+        self.log(f"LastKnownUser: {plan.last_user or '??'}", 'dim')
+        self.log(f"User folder: {plan.user_dir if plan.user_dir else 'NOT FOUND (will still update root)'}", 'dim')
+
+        return plan
+
+    def prepare_run(self, status):
+        """Shared start of VERIFY/PREVIEW/APPLY. Returns (tx, ty, plan) or None if the run should stop."""
+        self.clear_log()
+        self.set_status(status)
+
+        parsed = self.parse_inputs()
+        if not parsed:
+            self.set_status("Invalid input")
+            return None
+        nx, ny, tx, ty = parsed
+
+        plan = self.get_targets_and_check(nx, ny, force=self.chk_force.get())
+        if plan is None:
+            return None
+
+        self.log("\nPlanned updates:")
+        for p, lbl in plan.targets:
+            self.log(f" - {lbl} -> {p}")
+        return tx, ty, plan
+
+    def process_targets(self, plan, tx, ty, apply_changes):
+        # Targets are independent files, so overlap their read/rewrite/write.
+        # Logs are flushed in target order so the output reads the same as before.
+        with ThreadPoolExecutor(max_workers=len(plan.targets)) as ex:
+            futures = [
+                ex.submit(_process_one, p, tx, ty, apply_changes, lbl,
+                          plan.root_lines if p == plan.gus_root else None)
+                for p, lbl in plan.targets
+            ]
+            for f in futures:
+                for msg in f.result():
+                    self.log(msg)
+
     def run_async(self, func):
         thread = threading.Thread(target=func, daemon=True)
         thread.start()
         
     def preflight(self):
         def _run():
-            self.clear_log()
-            self.set_status("Verifying configuration...")
-            
-            parsed = self.parse_inputs()
-            if not parsed:
-                self.set_status("Invalid input")
-                return
-            nx, ny, tx, ty = parsed
-            
             try:
-                targets = self.get_targets_and_check(nx, ny, force=self.chk_force.get())
-                if targets is None:
+                if self.prepare_run("Verifying configuration...") is None:
                     return
                     
-                self.log("\nPlanned updates:")
-                for p, lbl in targets:
-                    self.log(f" - {lbl} -> {p}")
-                    
                 self.log("\nVerification complete.", 'success')
                 self.set_status("Verification complete")
             except Exception as e:
@@ -572,30 +712,14 @@ class ProfessionalApp(tk.Tk):
         
     def dry_run(self):
         def _run():
-            self.clear_log()
-            self.set_status("Running preview...")
-            
-            parsed = self.parse_inputs()
-            if not parsed:
-                self.set_status("Invalid input")
-                return
-            nx, ny, tx, ty = parsed
-            
             try:
-                targets = self.get_targets_and_check(nx, ny, force=self.chk_force.get())
-                if targets is None:
+                prepared = self.prepare_run("Running preview...")
+                if prepared is None:
                     return
-                    
-                self.log("\nPlanned updates:")
-                for p, lbl in targets:
-                    self.log(f" - {lbl} -> {p}")
+                tx, ty, plan = prepared
                     
                 # Process each target with dry run
-                for p, lbl in targets:
-                    if p.exists():
-                        process_gus(p, tx, ty, apply_changes=False, label=lbl, log_func=self.log)
-                    else:
-                        self.log(f"- Not found: {lbl} -> {p} (skipped)")
+                self.process_targets(plan, tx, ty, apply_changes=False)
                         
                 self.log("\nDry run complete.", 'success')
                 self.set_status("Preview complete")
@@ -607,30 +731,15 @@ class ProfessionalApp(tk.Tk):
         
     def apply(self):
         def _run():
-            self.clear_log()
-            self.set_status("Applying configuration...")
-            
-            parsed = self.parse_inputs()
-            if not parsed:
-                self.set_status("Invalid input")
-                return
-            nx, ny, tx, ty = parsed
-            
             try:
-                targets = self.get_targets_and_check(nx, ny, force=self.chk_force.get())
-                if targets is None:
+                prepared = self.prepare_run("Applying configuration...")
+                if prepared is None:
                     return
+                tx, ty, plan = prepared
                     
-                self.log("\nPlanned updates:")
-                for p, lbl in targets:
-                    self.log(f" - {lbl} -> {p}")
-                    
-                # Process each target with actual writes
-                for p, lbl in targets:
-                    if p.exists():
-                        process_gus(p, tx, ty, apply_changes=True, label=lbl, log_func=self.log)
-                    else:
-                        self.log(f"- Not found: {lbl} -> {p} (skipped)")
+                # Process each target with actual writes; the cached plan is stale afterwards
+                self._cached_plan = None
+                self.process_targets(plan, tx, ty, apply_changes=True)
                         
                 self.log("\nDone.", 'success')
                 self.log(f"Next steps:", 'success')
@@ -642,6 +751,7 @@ class ProfessionalApp(tk.Tk):
                 self.log(f"Error: {e}", 'error')
                 self.set_status("Error occurred")
                 
+        from tkinter import messagebox
         result = messagebox.askquestion(
             "Confirm",
             "This will modify VALORANT configuration files.\n\n"
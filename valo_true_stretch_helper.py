@@ -1,87 +1,166 @@
 
-import argparse, os, re, sys, difflib
+import argparse, os, re, sys, functools, json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 FULLSCREEN_KEY = "FullscreenMode"
 HDR_KEY = "HDRDisplayOutputNits"
+# {ini path: [mtime_ns, size, "WxH"]} of the files this script last left correct
+STAMP_PATH = Path(__file__).parent / ".valo_stamp.json"
+
+_LKU_RE = re.compile(r"^\s*LastKnownUser\s*=\s*([A-Za-z0-9\-]+)\s*$")
+# built once from the key constants, escaped so the keys are matched literally
+_HDR_LINE_RE = re.compile(rf"^\s*{re.escape(HDR_KEY)}\s*=\s*\d+\s*$")
+_FS_LINE_RE = re.compile(rf"^\s*{re.escape(FULLSCREEN_KEY)}\s*=\s*\d+\s*$")
+# ASCII whitespace str.strip() would remove inside a line (\r is already gone)
+_BWS = rb"[ \t\x0b\x0c\x1c-\x1f]*"
 
 def parse_whx(s):
-    m = re.fullmatch(r"\s*(\d+)\s*[xX]\s*(\d+)\s*", s)
-    if not m:
+    w, sep, h = s.strip().lower().partition("x")
+    w, h = w.rstrip(), h.lstrip()
+    if not sep or not w.isdecimal() or not h.isdecimal():
         raise ValueError("Use format WxH (e.g., 2560x1440)")
-    return int(m.group(1)), int(m.group(2))
+    return int(w), int(h)
 
 def read_lines(path: Path):
-    return path.read_text(encoding="utf-8", errors="ignore").splitlines(keepends=True)
-
-def write_lines(path: Path, lines):
-    path.write_text("".join(lines), encoding="utf-8")
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        return f.readlines()
 
-def update_kv_lines(lines, updates: dict):
-    changed = False
-    found = set()
-    out = []
+def _file_has_lines(path: Path, lines):
+    """True if path already holds exactly the bytes write_lines would write for lines."""
+    try:
+        old = memoryview(path.read_bytes())
+    except FileNotFoundError:
+        return False
+    pos = 0
     for ln in lines:
-        m = re.match(r"^\s*([A-Za-z0-9_]+)\s*=\s*(.*)\s*$", ln)
-        if m:
-            k = m.group(1)
-            if k in updates and updates[k] is not None:
-                v = str(updates[k])
-                new_ln = f"{k}={v}\n"
-                if ln != new_ln:
-                    changed = True
-                    ln = new_ln
-                found.add(k)
-        out.append(ln)
-    for k, v in updates.items():
-        if v is None: continue
-        if k not in found:
-            out.append(f"{k}={v}\n")
-            changed = True
-    return out, changed
-
-def ensure_hdr_and_fullscreen(lines, hdr_val="1000", fs_val="2"):
+        chunk = ln.replace("\n", os.linesep).encode("utf-8")
+        end = pos + len(chunk)
+        if old[pos:end] != chunk:
+            return False
+        pos = end
+    return pos == len(old)
+
+def write_lines(path: Path, lines):
+    # stage next to the target and swap it in, so a crash or a game reading the
+    # file mid-write never sees it half written
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+@functools.lru_cache(maxsize=None)
+def _key_lines_re(keys):
+    # lines whose stripped text starts with one of keys, found in one C-level scan
+    return re.compile(rf"^[^\S\n]*(?:{'|'.join(map(re.escape, keys))})", re.MULTILINE)
+
+def _last_line(lines, edits):
+    # last line of rewrite_gus(lines, edits), None for an empty result
+    j = len(lines) - 1
+    for i, new_lines in reversed(edits):
+        if i != j:
+            break
+        if new_lines:
+            return new_lines[-1]
+        j -= 1
+    return lines[j] if j >= 0 else None
+
+def plan_gus(lines, updates: dict, hdr_val="1000", fs_val="2"):
     """
-    Guarantee HDRDisplayOutputNits=hdr_val and FullscreenMode=fs_val
-    with FullscreenMode placed directly below HDR.
+    Work out what has to change in the ini lines: set every key in updates
+    (adding missing ones at EOF) and guarantee HDRDisplayOutputNits=hdr_val
+    and FullscreenMode=fs_val with FullscreenMode placed directly below HDR.
     If HDR line missing entirely, append both HDR + Fullscreen at EOF.
+    Returns a list of edits (index, replacement_lines) in line order, where
+    index == len(lines) means "append at EOF". No edits means no change.
     """
-    out = []
+    hdr_ln = f"{HDR_KEY}={hdr_val}\n"
+    fs_ln = f"{FULLSCREEN_KEY}={fs_val}\n"
+    edits = []
+    found = set()
     seen_hdr = False
-    inserted_fs = False
-
-    for ln in lines:
-        if re.match(rf"^\s*{HDR_KEY}\s*=\s*\d+\s*$", ln):
-            seen_hdr = True
-            ln = f"{HDR_KEY}={hdr_val}\n"
-            out.append(ln)
-            out.append(f"{FULLSCREEN_KEY}={fs_val}\n")
-            inserted_fs = True
-        elif re.match(rf"^\s*{FULLSCREEN_KEY}\s*=\s*\d+\s*$", ln):
-            # skip old FullscreenMode lines, since we'll reinsert
+    skip = -1
+    # most lines aren't one of our keys; a regex over the whole text finds the
+    # ones that may be, only those are looked at line by line
+    text = "".join(lines)
+    pat = _key_lines_re(tuple(updates) + (HDR_KEY, FULLSCREEN_KEY))
+    i = pos = 0
+    for m in pat.finditer(text):
+        i += text.count("\n", pos, m.start())
+        pos = m.start()
+        if i == skip:
+            # FullscreenMode already right below HDR with the wanted value
             continue
-        else:
-            out.append(ln)
-
+        ln = lines[i]
+        head, sep, _ = ln.partition("=")
+        k = head.strip() if sep else None
+        if k == HDR_KEY and _HDR_LINE_RE.match(ln):
+            seen_hdr = True
+            if i + 1 < len(lines) and lines[i + 1] == fs_ln:
+                skip = i + 1
+                if ln != hdr_ln:
+                    edits.append((i, [hdr_ln]))
+            else:
+                edits.append((i, [hdr_ln, fs_ln]))
+        elif k == FULLSCREEN_KEY and _FS_LINE_RE.match(ln):
+            # drop old FullscreenMode lines, since we reinsert below HDR
+            edits.append((i, []))
+        elif k in updates and updates[k] is not None:
+            new_ln = f"{k}={updates[k]}\n"
+            if ln != new_ln:
+                edits.append((i, [new_ln]))
+            found.add(k)
+    del text
+
+    tail = [f"{k}={v}\n" for k, v in updates.items() if v is not None and k not in found]
     if not seen_hdr:
-        if len(out) == 0 or not out[-1].endswith("\n"):
-            out.append("\n")
-        out.append(f"{HDR_KEY}={hdr_val}\n")
-        out.append(f"{FULLSCREEN_KEY}={fs_val}\n")
-        inserted_fs = True
-
-    return out, inserted_fs
-
-def file_diff(old_lines, new_lines, label):
-    return "".join(
-        difflib.unified_diff(
-            old_lines, new_lines,
-            fromfile=f"{label} (current)",
-            tofile=f"{label} (new)",
-            n=3
-        )
-    )
-
+        last = tail[-1] if tail else _last_line(lines, edits)
+        if last is None or not last.endswith("\n"):
+            tail.append("\n")
+        tail += [hdr_ln, fs_ln]
+    if tail:
+        edits.append((len(lines), tail))
+
+    return edits
+
+def rewrite_gus(lines, edits):
+    """Yield the rewritten file: lines with the edits from plan_gus applied."""
+    j = 0
+    for i, new_lines in edits:
+        yield from lines[j:i]
+        yield from new_lines
+        j = i + 1
+    yield from lines[j:]
+
+def _hunk_range(start, count):
+    # unified diff ranges are 1-based; an empty range names the line before it
+    if count == 1:
+        return str(start + 1)
+    return f"{start if count == 0 else start + 1},{count}"
+
+def file_diff(old_lines, edits, label):
+    """
+    Unified diff (no context lines) straight from the plan_gus edits, so the cost
+    is the number of changed lines rather than a SequenceMatcher over the file.
+    """
+    out = [f"--- {label} (current)\n", f"+++ {label} (new)\n"]
+    shift = 0  # new line index - old line index, from the edits so far
+    for i, new_lines in edits:
+        old = [old_lines[i]] if i < len(old_lines) else []
+        if old and new_lines and new_lines[0] == old[0]:
+            # line kept, only something inserted after it (HDR without Fullscreen)
+            old, new_lines, i = [], new_lines[1:], i + 1
+        out.append(f"@@ -{_hunk_range(i, len(old))} +{_hunk_range(i + shift, len(new_lines))} @@\n")
+        out += ["-" + ln if ln.endswith("\n") else "-" + ln + "\n" for ln in old]
+        out += ["+" + ln if ln.endswith("\n") else "+" + ln + "\n" for ln in new_lines]
+        shift += len(new_lines) - len(old)
+    return "".join(out)
+
+@functools.lru_cache(maxsize=None)
 def get_base_config_dir():
     local = os.environ.get("LOCALAPPDATA")
     if not local:
@@ -89,50 +168,66 @@ def get_base_config_dir():
         sys.exit(1)
     return Path(local) / "VALORANT" / "Saved" / "Config"
 
+@functools.lru_cache(maxsize=None)
 def get_last_known_user(windows_client_dir: Path):
     rlmi = windows_client_dir / "RiotLocalMachine.ini"
     if not rlmi.is_file():
         return None
-    txt = rlmi.read_text(encoding="utf-8", errors="ignore").splitlines()
-    for ln in txt:
-        m = re.match(r"^\s*LastKnownUser\s*=\s*([A-Za-z0-9\-]+)\s*$", ln)
+    txt = rlmi.read_text(encoding="utf-8", errors="ignore")
+    # str.find does the scanning; only lines that mention the key get the regex
+    idx = txt.find("LastKnownUser")
+    while idx >= 0:
+        start = txt.rfind("\n", 0, idx) + 1
+        end = txt.find("\n", idx)
+        if end < 0:
+            end = len(txt)
+        m = _LKU_RE.match(txt[start:end])
         if m:
             return m.group(1)
+        idx = txt.find("LastKnownUser", end)
     return None
 
 def find_user_folder(base: Path, last_known: str):
     if not last_known:
         return None
-    candidates = [p for p in base.iterdir()
-                  if p.is_dir() and p.name.lower().startswith(last_known.lower() + "-")]
-    def score(p):
-        s = 0
-        if (p / "Windows").is_dir(): s += 1
-        if (p / "WindowsClient").is_dir(): s += 1
-        return s
-    if not candidates:
-        return None
-    candidates.sort(key=score, reverse=True)
-    return candidates[0]
+    prefix = last_known.lower() + "-"
+    best_score, best = -1, None
+    # DirEntry.is_dir() uses the directory listing data, no extra stat per entry
+    with os.scandir(base) as it:
+        for entry in it:
+            if not entry.name.lower().startswith(prefix) or not entry.is_dir():
+                continue
+            s = (os.path.isdir(os.path.join(entry.path, "Windows"))
+                 + os.path.isdir(os.path.join(entry.path, "WindowsClient")))
+            # first folder with the best score wins, same as the old stable sort
+            if s > best_score:
+                best_score, best = s, entry.path
+                if s == 2:
+                    break
+    return Path(best) if best else None
 
 def native_check_ok(lines, native_x, native_y):
-    want = {
-        "ResolutionSizeX": str(native_x),
-        "ResolutionSizeY": str(native_y),
-        "LastUserConfirmedResolutionSizeX": str(native_x),
-        "LastUserConfirmedResolutionSizeY": str(native_y),
-        "bShouldLetterbox": "False",
-        "bLastConfirmedShouldLetterbox": "False",
-    }
-    got = {}
+    # native settings are the same six keys the target rewrite sets
+    remaining = dict(make_updates_for_target(native_x, native_y))
+    prefixes = tuple(remaining)
     for ln in lines:
-        m = re.match(r"^\s*([A-Za-z0-9_]+)\s*=\s*(.*)\s*$", ln)
-        if m:
-            got[m.group(1)] = m.group(2).strip()
-    for k, v in want.items():
-        if got.get(k) != v:
-            return False, k, got.get(k)
-    return True, None, None
+        stripped = ln.lstrip()
+        if not stripped.startswith(prefixes):
+            continue
+        head, sep, rest = stripped.partition("=")
+        if not sep:
+            continue
+        k = head.rstrip()
+        want = remaining.pop(k, None)
+        if want is None:
+            continue
+        got = rest.strip()
+        if got != want:
+            return False, k, got
+        if not remaining:
+            return True, None, None
+    # at least one wanted key isn't in the file
+    return False, next(iter(remaining)), None
 
 def make_updates_for_target(target_x, target_y):
     return {
@@ -144,31 +239,80 @@ def make_updates_for_target(target_x, target_y):
         "bLastConfirmedShouldLetterbox": "False",
     }
 
-def process_gus(path: Path, target_x, target_y, apply_changes, label):
-    if not path.is_file():
-        print(f"- Skipping (not found): {label} -> {path}")
-        return
-    old = read_lines(path)
+def quick_is_uptodate(path: Path, updates: dict, hdr_val="1000", fs_val="2"):
+    """
+    Cheap check on the raw bytes: True only if plan_gus would find nothing to change,
+    so an already set up file never gets split into lines. Anything unusual (non-ASCII,
+    duplicated or odd HDR/Fullscreen lines, ...) gives False and the full parse decides.
+    """
+    data = path.read_bytes()
+    if not data.isascii():
+        return False
+    if b"\r" in data:
+        # same as the universal-newline translation read_lines gets
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    data = b"\n" + data
+    want = {k.encode(): f"{k}={v}\n".encode() for k, v in updates.items() if v is not None}
+    hdr_k, fs_k = HDR_KEY.encode(), FULLSCREEN_KEY.encode()
+    keys = b"|".join(re.escape(k) for k in (*want, hdr_k, fs_k))
+    # every line plan_gus would treat as one of our keys, by key
+    found = re.findall(rb"^" + _BWS + rb"(" + keys + rb")" + _BWS + rb"=", data, re.M)
+    pair = f"\n{HDR_KEY}={hdr_val}\n{FULLSCREEN_KEY}={fs_val}\n".encode()
+    n = data.count(pair)
+    if not n or found.count(hdr_k) != n or found.count(fs_k) != n:
+        return False
+    # each key line has to be exactly the wanted one
+    return all(0 < found.count(k) == data.count(b"\n" + ln) for k, ln in want.items())
+
+def load_stamps():
+    try:
+        with STAMP_PATH.open("r", encoding="utf-8") as f:
+            stamps = json.load(f)
+        return stamps if isinstance(stamps, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_stamps(stamps):
+    # only a shortcut for the next run, so a read-only script folder is fine
+    try:
+        with STAMP_PATH.open("w", encoding="utf-8") as f:
+            json.dump(stamps, f, indent=1)
+    except OSError:
+        pass
 
-    # 1) Update res + flags
-    updates = make_updates_for_target(target_x, target_y)
-    temp, changed_a = update_kv_lines(old, updates)
+def _stamp(path: Path, res):
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size, res]
+
+def read_lines_if_exists(path: Path):
+    try:
+        return read_lines(path)
+    except FileNotFoundError:
+        return None
 
-    # 2) Ensure HDR=1000 + FullscreenMode=2 together
-    temp2, inserted = ensure_hdr_and_fullscreen(temp, "1000", "2")
-    changed = changed_a or (temp2 != old)
+def process_gus(path: Path, old, target_x, target_y, apply_changes, label, show_diff=True):
+    """
+    Plan the rewrite of the already-read lines of one GameUserSettings.ini and print
+    the diff of it (unless show_diff is False).
+    Returns the edits if they should be written, else None (writes happen in main).
+    """
+    # Update res + flags and ensure HDR=1000 + FullscreenMode=2 together
+    updates = make_updates_for_target(target_x, target_y)
+    edits = plan_gus(old, updates, "1000", "2")
 
-    if not changed:
+    if not edits:
         print(f"- No changes needed: {label}")
-        return
+        return None
 
-    diff = file_diff(old, temp2, str(path))
-    print(f"\n>>> {label}\n{diff if diff.strip() else '(content replaced)'}")
-    if apply_changes:
-        write_lines(path, temp2)
-        print(f"-> Updated {label}.")
+    if show_diff:
+        diff = file_diff(old, edits, str(path))
+        print(f"\n>>> {label}\n{diff if diff.strip() else '(content replaced)'}")
     else:
+        print(f"- Changes needed: {label}")
+    if not apply_changes:
         print("-> Dry run (no write).")
+        return None
+    return edits
 
 def main():
     ap = argparse.ArgumentParser(
@@ -178,6 +322,7 @@ def main():
     ap.add_argument("--target", required=True, help="The res you want in Valorant, e.g. 1280x1024")
     ap.add_argument("--yes", action="store_true", help="Apply without confirmation")
     ap.add_argument("--force", action="store_true", help="Apply even if native-check fails")
+    ap.add_argument("--quiet", action="store_true", help="Don't print the per-file diffs")
     args = ap.parse_args()
 
     try:
@@ -228,11 +373,59 @@ def main():
         resp = input("\nApply changes? [y/N]: ").strip().lower()
         apply_changes = (resp == "y")
 
-    for p, lbl in targets:
-        if p.exists():
-            process_gus(p, tx, ty, apply_changes, lbl)
-        else:
-            print(f"- Not found: {lbl} -> {p} (skipped)")
+    updates = make_updates_for_target(tx, ty)
+    res = f"{tx}x{ty}"
+    stamps = load_stamps()
+
+    def stamped(p):
+        # untouched since this script left it correct for this target
+        return stamps.get(str(p)) == _stamp(p, res)
+
+    def load(p):
+        # (lines, note); lines is None for missing or already set up files
+        try:
+            if stamped(p):
+                return None, "Already applied"
+            if quick_is_uptodate(p, updates, "1000", "2"):
+                return None, "No changes needed"
+            return read_lines(p), None
+        except FileNotFoundError:
+            return None, None
+
+    # File I/O is overlapped across targets: the user-folder files are read
+    # together (root is already in memory), rewritten here, then written together.
+    with ThreadPoolExecutor(max_workers=len(targets)) as ex:
+        root_note = "Already applied" if stamped(gus_root) else None
+        olds = [(root_lines, root_note)] + list(ex.map(load, [p for p, _ in targets[1:]]))
+        pending = []
+        correct = []  # files known to be right now, stamped after an apply
+        for (p, lbl), (old, note) in zip(targets, olds):
+            if note:
+                print(f"- {note}: {lbl}")
+                correct.append(p)
+                continue
+            if old is None:
+                print(f"- Not found: {lbl} -> {p} (skipped)")
+                continue
+            edits = process_gus(p, old, tx, ty, apply_changes, lbl, show_diff=not args.quiet)
+            if edits is not None:
+                pending.append((p, lbl, old, edits))
+
+        def save(w):
+            p, _, old, edits = w
+            # the new content is generated while it's checked/written, never held as a second list
+            if _file_has_lines(p, rewrite_gus(old, edits)):
+                return False
+            write_lines(p, rewrite_gus(old, edits))
+            return True
+
+        written = list(ex.map(save, pending))
+    for (p, lbl, _, _), did in zip(pending, written):
+        print(f"-> Updated {lbl}." if did else f"- Already up to date on disk: {lbl}")
+        correct.append(p)
+    if apply_changes:
+        stamps.update((str(p), _stamp(p, res)) for p in correct)
+        save_stamps(stamps)
 
     print("\nDone.")
     print(f"Next steps:")